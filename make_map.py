@@ -6,7 +6,7 @@ Features
 - Two coloring modes: By Type (AP / Client / Bridge / Unknown) and By Signal Strength
 - Filter panel: toggle device types, minimum signal (dBm) slider, SSID search
 - Dynamic legend and live re-coloring without regenerating data
-- Marker clustering for performance
+- Marker clustering and canvas rendering for performance
 
 Usage
     python make_map.py \
@@ -16,28 +16,78 @@ Usage
         --title "Wardrive Map"
 
 Notes
-- The script embeds the GeoJSON directly into the HTML for simplicity (< ~10–20k points).
+- The script embeds the GeoJSON directly into the HTML for simplicity (< ~10–20k points),
+  gzip-compressed and base64-encoded; the page inflates it with DecompressionStream.
+- Signal strength, device type and lower-cased SSID are resolved here at build time and
+  embedded as compact columns, so the browser only indexes into arrays when filtering.
 - If you expect very large datasets, consider switching to a fetch() of a .geojson file on your webserver.
 """
 
 from __future__ import annotations
 import argparse
+import array
+import base64
+import io
 import json
+import math
 import re
+import sys
+import zlib
 from pathlib import Path
 from datetime import datetime
 
+# orjson is several times faster on large FeatureCollections; stdlib json is the fallback
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    def _loads(data: bytes):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # stdlib json.dumps (e.g. build_map.sh) writes NaN/Infinity, which orjson rejects
+            return json.loads(data)
+except ImportError:
+    def _finite(obj):
+        """obj with NaN/Infinity floats replaced by None, which is what orjson writes."""
+        if isinstance(obj, float):
+            return obj if math.isfinite(obj) else None
+        if isinstance(obj, dict):
+            return {k: _finite(v) for k, v in obj.items()}
+        if isinstance(obj, (list, tuple)):
+            return [_finite(v) for v in obj]
+        return obj
+
+    def _dumps(obj) -> str:
+        try:
+            return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), allow_nan=False)
+        except ValueError:
+            # The page reads the payload with JSON.parse, which has no NaN/Infinity
+            return json.dumps(_finite(obj), ensure_ascii=False, separators=(",", ":"))
+
+    def _loads(data: bytes):
+        return json.loads(data)
+
 # ------------------------- Helpers -------------------------
 
+# Case-insensitive by construction, so no flag lookup or .lower() per call
+_DBM_RE = re.compile(r"\s*[dD][bB][mM]?$")
+
+
 def coerce_float(val):
     if val is None:
         return None
-    if isinstance(val, (int, float)):
+    # fast path: numbers and clean numeric strings (the common case) need no normalization
+    try:
         return float(val)
+    except (TypeError, ValueError):
+        pass
     # normalize weird unicode minus and strip units like " dBm", "dbm"
     s = str(val).strip()
     s = s.replace("\u2212", "-")  # Unicode minus to ASCII hyphen
-    s = re.sub(r"\s*dBm?$", "", s, flags=re.IGNORECASE)
+    s = _DBM_RE.sub("", s)
     s = s.replace(",", ".")
     try:
         return float(s)
@@ -62,44 +112,96 @@ TYPE_KEYS = [
 ]
 
 
+# Ordered tuple: the first key with a usable value wins
+_SIG_KEYS = tuple(SIGNAL_KEYS)
+
+# One scan finds every type hint; longer phrases come first so e.g. "base station"
+# is not split into a client "station" hit
+_TYPE_RE = re.compile(
+    r"bridged?|access point|infrastructure|base station|\bap\b"
+    r"|client|station|\bsta\b|phone|laptop|\bwifi\b"
+)
+_TYPE_OF_HINT = {
+    "bridge": "bridge", "bridged": "bridge",
+    "access point": "ap", "infrastructure": "ap", "base station": "ap", "ap": "ap",
+    "client": "client", "station": "client", "sta": "client", "phone": "client", "laptop": "client",
+    "wifi": "wifi",
+}
+_EXPLICIT_TYPES = {"client": "client", "ap": "ap", "access point": "ap", "bridge": "bridge"}
+
+# Order matters: the map encodes types as their index in this tuple
+TYPE_NAMES = ("ap", "client", "bridge", "unknown")
+_TYPE_CODES = {t: i for i, t in enumerate(TYPE_NAMES)}
+
+
+def first_prop(props: dict, *keys):
+    for k in keys:
+        v = props.get(k)
+        if v:
+            return v
+    return None
+
+
 def infer_type(props: dict) -> str:
-    text = " ".join(str(props.get(k, "")) for k in TYPE_KEYS).lower()
-    # Heuristics
-    if any(x in text for x in ["bridge", "bridged"]):
-        return "bridge"
-    if any(x in text for x in ["ap", "access point", "infrastructure", "base station"]):
+    # Prefer explicit field if present
+    explicit = str(props.get("Type") or props.get("type") or "").strip().lower()
+    if explicit in _EXPLICIT_TYPES:
+        return _EXPLICIT_TYPES[explicit]
+    text = " ".join([str(props.get(k, "")) for k in TYPE_KEYS]).lower()
+    # Heuristics, in priority order bridge > ap > client
+    hits = {_TYPE_OF_HINT[m] for m in _TYPE_RE.findall(text)}
+    for t in ("bridge", "ap", "client"):
+        if t in hits:
+            return t
+    if "wifi" in hits:
+        return "ap"  # Wigle exports tag access points as "WIFI"
+    # An SSID plus a channel typically means an AP
+    ssid = first_prop(props, "SSID", "ssid", "dot11.device.ssid")
+    if ssid and first_prop(props, "Channel", "channel", "kismet.device.base.channel"):
         return "ap"
-    if any(x in text for x in ["client", "station", "sta", "phone", "laptop"]):
-        return "client"
     # fallbacks using capabilities/encryption hints if present
+    enc = str(first_prop(props, "Encryption", "encryption") or "").lower()
+    if enc and enc not in ("unknown", "open"):
+        return "ap"
     if "ssid" in props and props.get("ssid"):
         return "ap"  # many exports list AP features with SSID
     return "unknown"
 
 
+# Signal-looking child keys per nested dict, keyed on its key tuple (insertion order kept):
+# exports repeat the same few nested shapes, so the name test runs once per shape
+_SIG_CHILDREN: dict[tuple, tuple] = {}
+
+
 def extract_signal_dbm(props: dict) -> float | None:
-    for key in SIGNAL_KEYS:
-        if key in props:
-            val = coerce_float(props.get(key))
+    for key in _SIG_KEYS:
+        v = props.get(key)
+        if v is not None:
+            val = coerce_float(v)
             if val is not None:
                 return val
     # Sometimes nested under "signal" dicts
-    for k, v in props.items():
+    for v in props.values():
         if isinstance(v, dict):
             # search shallow nested keys
-            for kk, vv in v.items():
-                if any(p in kk.lower() for p in ["signal", "dbm"]):
-                    cand = coerce_float(vv)
-                    if cand is not None:
-                        return cand
+            shape = tuple(v)
+            keys = _SIG_CHILDREN.get(shape)
+            if keys is None:
+                keys = _SIG_CHILDREN[shape] = tuple(
+                    kk for kk in shape if any(p in kk.lower() for p in ["signal", "dbm"])
+                )
+            for kk in keys:
+                cand = coerce_float(v[kk])
+                if cand is not None:
+                    return cand
     return None
 
 
 def load_geojson(primary: Path, fallback: Path | None) -> dict:
     if primary and primary.exists():
-        return json.loads(primary.read_text(encoding="utf-8"))
+        return _loads(primary.read_bytes())
     if fallback and fallback.exists():
-        return json.loads(fallback.read_text(encoding="utf-8"))
+        return _loads(fallback.read_bytes())
     raise FileNotFoundError("No GeoJSON found. Provide --in or --fallback that exists.")
 
 
@@ -174,71 +276,26 @@ HTML_TEMPLATE = """<!doctype html>
 
   <script src=\"{leaflet_js}\"></script>
   <script src=\"{cluster_js}\"></script>
-  <script>
+  <!-- module script: allows top-level await while the embedded data is inflated -->
+  <script type=\"module\">
   // --- Embedded data ---
-  const GEOJSON = {geojson};
-
-  // --- Utilities ---
-  function coerceFloat(x) {
-    if (x === null || x === undefined) return null;
-    if (typeof x === 'number') return x;
-    let s = String(x).trim().replace('\u2212','-').replace(/\s*dBm?$/i,'');
-    s = s.replace(',', '.');
-    const v = parseFloat(s);
-    return Number.isFinite(v) ? v : null;
-  }
+  // GeoJSON is gzip + base64; the browser inflates it natively before anything else runs
+  const GEOJSON_B64 = \"{geojson}\";
 
-  const SIGNAL_KEYS = {signal_keys};
-  const TYPE_KEYS = {type_keys};
-
-  function extractSignal(props) {
-    for (const k of SIGNAL_KEYS) {
-      if (k in props) {
-        const v = coerceFloat(props[k]);
-        if (v !== null) return v;
-      }
-    }
-    for (const [k, v] of Object.entries(props)) {
-      if (v && typeof v === 'object') {
-        for (const [kk, vv] of Object.entries(v)) {
-          if (/(signal|dbm)/i.test(kk)) {
-            const c = coerceFloat(vv);
-            if (c !== null) return c;
-          }
-        }
-      }
-    }
-    return null;
+  function bytesFromBase64(b64) {
+    return Uint8Array.from(atob(b64), c => c.charCodeAt(0));
   }
 
-  function inferType(props) {
-    const raw = TYPE_KEYS.map(k => (props[k] || '')).join(' ').toLowerCase();
-  
-    // Prefer explicit field if present
-    const explicit = (props['Type'] || props['type'] || '').toString().trim().toLowerCase();
-    if (explicit === 'client') return 'client';
-    if (explicit === 'ap' || explicit === 'access point') return 'ap';
-    if (explicit === 'bridge') return 'bridge';
-
-    // Normalize common variants
-    if (/\bbridge|bridged\b/.test(raw)) return 'bridge';
-    if (/\bclient|station|\bsta\b/.test(raw)) return 'client';
-  
-    // Treat Wigle "WIFI" as an AP
-    if (/\bwifi\b/.test(raw)) return 'ap';
-  
-    // Heuristics: having an SSID + Channel typically means AP
-    const hasSsid = !!(props['SSID'] || props['ssid'] || props['dot11.device.ssid']);
-    const hasChan = !!(props['Channel'] || props['channel'] || props['kismet.device.base.channel']);
-    if (hasSsid && hasChan) return 'ap';
-  
-    // Fallback: if any encryption hint present, bias to AP
-    const enc = (props['Encryption'] || props['encryption'] || '').toString().toLowerCase();
-    if (enc && enc !== 'unknown' && enc !== 'open') return 'ap';
-  
-    return 'unknown';
+  async function inflateJson(b64) {
+    const stream = new Blob([bytesFromBase64(b64)]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return JSON.parse(await new Response(stream).text());
   }
 
+  const GEOJSON = await inflateJson(GEOJSON_B64);
+  // Per-feature filter columns precomputed by make_map.py, index-aligned with GEOJSON.features
+  const COLS = {cols};
+  const TYPE_NAMES = {type_names};
+  const SIG_MISSING = {sig_missing};
 
   // Colors for type mode (matching your earlier scheme)
   const TYPE_COLORS = {
@@ -248,54 +305,69 @@ HTML_TEMPLATE = """<!doctype html>
     unknown: '#9e9e9e' // gray
   };
 
-  // Colors for signal mode
-  function colorBySignal(dbm) {
-    if (dbm === null) return '#9e9e9e';
-    if (dbm >= -60) return '#2e7d32'; // strong
-    if (dbm >= -75) return '#f9a825'; // medium
-    return '#c62828'; // weak
-  }
+  // Colors for signal mode, indexed by signal bucket: strong, medium, weak, N/A
+  const SIG_COLORS = ['#2e7d32', '#f9a825', '#c62828', '#9e9e9e'];
+  const SIG_LABELS = ['≥ -60 dBm', '-75 to -60 dBm', '< -75 dBm', 'N/A'];
 
   function signalBucket(dbm) {
-    if (dbm === null) return 'N/A';
-    if (dbm >= -60) return '≥ -60 dBm';
-    if (dbm >= -75) return '-75 to -60 dBm';
-    return '< -75 dBm';
+    if (Number.isNaN(dbm)) return 3;
+    if (dbm >= -60) return 0;
+    if (dbm >= -75) return 1;
+    return 2;
   }
 
-  // Build map
-  const map = L.map('map');
+  // Build map; circle markers share one canvas instead of one SVG node each
+  const canvasRenderer = L.canvas({ padding: 0.5 });
+  const map = L.map('map', { preferCanvas: true, renderer: canvasRenderer });
   const tiles = L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
     maxZoom: 19,
     attribution: '&copy; OpenStreetMap contributors'
   }).addTo(map);
 
-  const cluster = L.markerClusterGroup();
+  // chunkedLoading yields to the browser between batches so big refreshes don't freeze the UI.
+  // A running chunked add can't be cancelled, so refreshes wait for it (see scheduleRefresh).
+  const cluster = L.markerClusterGroup({
+    chunkedLoading: true, chunkInterval: 200, chunkDelay: 50, removeOutsideVisibleBounds: true,
+    chunkProgress: (processed, total) => { if (processed === total) addDone(); },
+  });
 
-  // Build markers with cached props
+  // Columnar (SoA) feature cache: one typed array per field, markers built lazily by index
   const features = GEOJSON.features || [];
-  const items = features.map((f) => {
-    const p = f.properties || {};
-    const s = extractSignal(p);
-    const t = inferType(p);
-    const latlng = f.geometry && f.geometry.coordinates && f.geometry.coordinates.length >= 2 ? [f.geometry.coordinates[1], f.geometry.coordinates[0]] : null;
-    return {
-      latlng,
-      props: p,
-      signal: s,
-      type: t,
-      raw: f,
-      marker: null,
-    };
-  }).filter(x => Array.isArray(x.latlng));
+  const N = features.length;
+  const TYPE_CODES = Object.fromEntries(TYPE_NAMES.map((t, i) => [t, i]));
+  const TYPE_COLORS_ARR = TYPE_NAMES.map(t => TYPE_COLORS[t]);
+  // lat/lon arrive as base64 little-endian float64 bytes: viewed in place, no per-feature arrays
+  const lat = new Float64Array(bytesFromBase64(COLS.lat).buffer);
+  const lon = new Float64Array(bytesFromBase64(COLS.lon).buffer);
+  const sig = new Float64Array(N); // NaN = no signal
+  const typ = Uint8Array.from(COLS.typ);
+  const bucket = new Uint8Array(N); // signal bucket, precomputed so coloring is a table lookup
+  const ssid = COLS.ssid;      // lower-cased, for the SSID filter
+  const props = features.map(f => f.properties || {});
+  const markers = new Array(N).fill(null);
+  let minLat = Infinity, minLon = Infinity, maxLat = -Infinity, maxLon = -Infinity;
+  for (let i = 0; i < N; i++) {
+    sig[i] = COLS.sig[i] === SIG_MISSING ? NaN : COLS.sig[i];
+    bucket[i] = signalBucket(sig[i]);
+    if (lat[i] < minLat) minLat = lat[i];
+    if (lat[i] > maxLat) maxLat = lat[i];
+    if (lon[i] < minLon) minLon = lon[i];
+    if (lon[i] > maxLon) maxLon = lon[i];
+  }
+
+  function signalAt(i) {
+    return Number.isNaN(sig[i]) ? null : sig[i];
+  }
 
   // Initial bounds
-  if (items.length) {
-    const bounds = L.latLngBounds(items.map(i => i.latlng));
+  if (N) {
+    const bounds = L.latLngBounds([minLat, minLon], [maxLat, maxLon]);
     map.fitBounds(bounds.pad(0.1));
   } else {
     map.setView([47.4979, 19.0402], 12); // Budapest default
   }
+  // On the map before the first addLayers(), so every add goes through chunkProgress
+  map.addLayer(cluster);
 
   // Controls
   const modeEls = Array.from(document.querySelectorAll('input[name="mode"]'));
@@ -310,54 +382,57 @@ HTML_TEMPLATE = """<!doctype html>
     minsigEl.value = -120; sigvalEl.textContent = '-120';
     typeEls.forEach(c => c.checked = true);
     ssidqEl.value = '';
-    refresh();
+    scheduleRefresh();
   });
 
-  minsigEl.addEventListener('input', () => { sigvalEl.textContent = minsigEl.value; refresh(); });
-  typeEls.forEach(el => el.addEventListener('change', refresh));
-  modeEls.forEach(el => el.addEventListener('change', refresh));
-  ssidqEl.addEventListener('input', () => {
-    // debounce-lite
-    clearTimeout(window.__ssid_t);
-    window.__ssid_t = setTimeout(refresh, 200);
-  });
+  // Coalesce all filter events into at most one refresh() per animation frame
+  let rafPending = false;
+  let adding = false, refreshQueued = false;
+  function addDone() {
+    adding = false;
+    if (refreshQueued) { refreshQueued = false; scheduleRefresh(); }
+  }
+  function scheduleRefresh() {
+    if (adding) { refreshQueued = true; return; }
+    if (rafPending) return;
+    rafPending = true;
+    requestAnimationFrame(() => { rafPending = false; refresh(); });
+  }
+
+  minsigEl.addEventListener('input', () => { sigvalEl.textContent = minsigEl.value; scheduleRefresh(); });
+  typeEls.forEach(el => el.addEventListener('change', scheduleRefresh));
+  modeEls.forEach(el => el.addEventListener('change', scheduleRefresh));
+  ssidqEl.addEventListener('input', scheduleRefresh);
 
   function currentMode() {
     return modeEls.find(r => r.checked).value; // 'type' | 'signal'
   }
 
   function activeTypes() {
-    return new Set(typeEls.filter(c => c.checked).map(c => c.value));
+    // mask indexed by type code
+    const mask = new Uint8Array(TYPE_NAMES.length);
+    for (const c of typeEls) if (c.checked) mask[TYPE_CODES[c.value]] = 1;
+    return mask;
   }
 
   function ssidQuery() {
     return (ssidqEl.value || '').trim().toLowerCase();
   }
 
-  function passesFilters(it) {
-    if (!activeTypes().has(it.type)) return false;
-    const minSig = parseFloat(minsigEl.value);
-    if (Number.isFinite(minSig)) {
-      if (it.signal !== null && it.signal < minSig) return false;
-    }
-    const q = ssidQuery();
-    if (q) {
-      const ssid = (it.props['SSID'] || it.props['ssid'] || it.props['dot11.device.ssid'] || '').toString().toLowerCase();
-      if (!ssid.includes(q)) return false;
-    }
-    return true;
+  // typeMask/minSig/q are read once per refresh(), not once per feature
+  function passesFilters(i, typeMask, minSig, q) {
+    if (!typeMask[typ[i]]) return false;
+    // NaN signal (unknown) always passes the slider
+    if (sig[i] < minSig) return false;
+    return q === '' || ssid[i].indexOf(q) >= 0;
   }
 
-  function markerStyle(it) {
-    if (currentMode() === 'type') {
-      return TYPE_COLORS[it.type] || TYPE_COLORS.unknown;
-    } else {
-      return colorBySignal(it.signal);
-    }
+  function markerStyle(i, mode) {
+    return mode === 'type' ? TYPE_COLORS_ARR[typ[i]] : SIG_COLORS[bucket[i]];
   }
 
-  function updateLegend() {
-    if (currentMode() === 'type') {
+  function updateLegend(mode = currentMode()) {
+    if (mode === 'type') {
       legendEl.innerHTML = `
         <span><span class="swatch" style="background:${TYPE_COLORS.ap}"></span>AP</span>
         <span><span class="swatch" style="background:${TYPE_COLORS.client}"></span>Client</span>
@@ -367,28 +442,29 @@ HTML_TEMPLATE = """<!doctype html>
     } else {
       // signal legend
       legendEl.innerHTML = `
-        <span><span class="swatch" style="background:#2e7d32"></span>≥ -60</span>
-        <span><span class="swatch" style="background:#f9a825"></span>-75..-60</span>
-        <span><span class="swatch" style="background:#c62828"></span>< -75</span>
-        <span><span class="swatch" style="background:#9e9e9e"></span>N/A</span>
+        <span><span class="swatch" style="background:${SIG_COLORS[0]}"></span>≥ -60</span>
+        <span><span class="swatch" style="background:${SIG_COLORS[1]}"></span>-75..-60</span>
+        <span><span class="swatch" style="background:${SIG_COLORS[2]}"></span>< -75</span>
+        <span><span class="swatch" style="background:${SIG_COLORS[3]}"></span>N/A</span>
       `;
     }
   }
 
-  function buildPopup(it) {
-    const p = it.props;
+  function buildPopup(i) {
+    const p = props[i];
+    const signal = signalAt(i);
     const ssid = p['SSID'] || p['ssid'] || p['dot11.device.ssid'] || '(hidden)';
     const bssid = p['BSSID'] || p['bssid'] || p['dot11.device.bssid'] || '—';
     const ch = p['Channel'] || p['channel'] || p['kismet.device.base.channel'] || '—';
     const enc = p['Encryption'] || p['encryption'] || p['dot11.device.encryption'] || '—';
-    const dbm = it.signal !== null ? `${it.signal.toFixed(0)} dBm` : 'N/A';
-    const sigb = signalBucket(it.signal);
+    const dbm = signal !== null ? `${signal.toFixed(0)} dBm` : 'N/A';
+    const sigb = SIG_LABELS[bucket[i]];
 
     return `
       <div style="font-family: system-ui; font-size: 13px;">
         <div style="font-weight:600; font-size:14px; margin-bottom:4px;">${ssid}</div>
         <div><b>BSSID:</b> ${bssid}</div>
-        <div><b>Type:</b> ${it.type}</div>
+        <div><b>Type:</b> ${TYPE_NAMES[typ[i]]}</div>
         <div><b>Signal:</b> ${dbm} <small>(${sigb})</small></div>
         <div><b>Channel:</b> ${ch}</div>
         <div><b>Encryption:</b> ${enc}</div>
@@ -396,32 +472,51 @@ HTML_TEMPLATE = """<!doctype html>
     `;
   }
 
-  function ensureMarker(it) {
-    if (it.marker) return it.marker;
-    const color = markerStyle(it);
-    const m = L.circleMarker(it.latlng, { radius: 6, weight: 1, color: '#222', fillColor: color, fillOpacity: 0.85 });
-    m.bindPopup(buildPopup(it));
-    it.marker = m;
+  // Coloring mode each marker was last styled with; hidden markers are restyled when shown again
+  const markerMode = new Array(N).fill(null);
+  const shownMask = new Uint8Array(N); // 1 = marker currently in the cluster group
+
+  function ensureMarker(i, mode) {
+    const existing = markers[i];
+    if (existing) {
+      if (markerMode[i] !== mode) {
+        existing.setStyle({ fillColor: markerStyle(i, mode) });
+        markerMode[i] = mode;
+      }
+      return existing;
+    }
+    const color = markerStyle(i, mode);
+    const m = L.circleMarker([lat[i], lon[i]], { renderer: canvasRenderer, radius: 6, weight: 1, color: '#222', fillColor: color, fillOpacity: 0.85 });
+    // Lazy popup: Leaflet calls this only when the popup is actually opened
+    m.bindPopup(() => buildPopup(i));
+    markers[i] = m;
+    markerMode[i] = mode;
     return m;
   }
 
   function refresh() {
-    updateLegend();
-    cluster.clearLayers();
-    let shown = 0;
-    for (const it of items) {
-      const color = markerStyle(it);
-      if (it.marker) {
-        it.marker.setStyle({ fillColor: color });
-        it.marker.setPopupContent(buildPopup(it));
-      }
-      if (passesFilters(it)) {
-        cluster.addLayer(ensureMarker(it));
-        shown++;
+    const mode = currentMode();
+    const typeMask = activeTypes();
+    const minSig = parseFloat(minsigEl.value);
+    const q = ssidQuery();
+    updateLegend(mode);
+    // Only the difference to what is already shown goes through the cluster group
+    const toAdd = [], toRemove = [];
+    let count = 0;
+    for (let i = 0; i < N; i++) {
+      if (passesFilters(i, typeMask, minSig, q)) {
+        const m = ensureMarker(i, mode);
+        if (!shownMask[i]) { toAdd.push(m); shownMask[i] = 1; }
+        count++;
+      } else if (shownMask[i]) {
+        toRemove.push(markers[i]);
+        shownMask[i] = 0;
       }
     }
-    if (!map.hasLayer(cluster)) map.addLayer(cluster);
-    countEl.textContent = String(shown);
+    cluster.removeLayers(toRemove);
+    adding = true; // cleared by chunkProgress once the last batch is in
+    cluster.addLayers(toAdd);
+    countEl.textContent = String(count);
   }
 
   // Initial render
@@ -443,8 +538,22 @@ HTML_TEMPLATE = """<!doctype html>
 """
 
 
-def build_html(geojson: dict, title: str) -> str:
-    # Manual, targeted replacements so JS/CSS braces aren’t interpreted by Python
+# Split once at import time into static text and data slots: the data is streamed
+# into the slots instead of being spliced into one giant string.
+# Layout: [text, slot, text, slot, ..., text]
+_TEMPLATE_PARTS = re.split(r"\{(geojson|cols)\}", HTML_TEMPLATE)
+
+# Only our own placeholders match, so JS/CSS braces are left untouched
+_PLACEHOLDER_RE = re.compile(
+    r"\{(title|leaflet_css|leaflet_js|cluster_css|cluster_css_default|cluster_js|type_names|sig_missing|generated)\}"
+)
+
+# int16 sentinel for "no signal" in the precomputed signal column
+SIG_MISSING = -32768
+
+
+def render_template_parts(title: str) -> list[str]:
+    """Return _TEMPLATE_PARTS with every placeholder but the data slots filled in."""
     mapping = {
         "title": title,
         "leaflet_css": LEAFLET_CSS,
@@ -452,19 +561,122 @@ def build_html(geojson: dict, title: str) -> str:
         "cluster_css": CLUSTER_CSS,
         "cluster_css_default": CLUSTER_CSS_DEFAULT,
         "cluster_js": CLUSTER_JS,
-        "geojson": json.dumps(geojson, ensure_ascii=False),
-        "signal_keys": json.dumps(SIGNAL_KEYS, ensure_ascii=False),
-        "type_keys": json.dumps(TYPE_KEYS, ensure_ascii=False),
+        "type_names": json.dumps(TYPE_NAMES),
+        "sig_missing": str(SIG_MISSING),
         "generated": datetime.utcnow().strftime("%Y-%m-%d %H:%M UTC"),
     }
 
-    html = HTML_TEMPLATE
-    for k, v in mapping.items():
-        html = html.replace("{" + k + "}", v)
-    return html
+    def sub(m: re.Match) -> str:
+        return mapping[m.group(1)]
 
+    return [
+        part if i % 2 else _PLACEHOLDER_RE.sub(sub, part)
+        for i, part in enumerate(_TEMPLATE_PARTS)
+    ]
 
 
+def has_point(feature: dict) -> bool:
+    coords = (feature.get("geometry") or {}).get("coordinates")
+    if not isinstance(coords, list) or len(coords) < 2:
+        return False
+    # Some exporters write coordinates as numeric strings; Leaflet accepted those, so do we
+    try:
+        return math.isfinite(float(coords[0])) and math.isfinite(float(coords[1]))
+    except (TypeError, ValueError):
+        return False
+
+
+def float64_base64(values: array.array) -> str:
+    """Base64 of the values as little-endian float64, ready for a JS Float64Array view."""
+    if sys.byteorder == "big":
+        values = array.array("d", values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def build_columns(features: list[dict]) -> dict:
+    """Precompute the map's per-feature filter columns so the browser never parses props.
+
+    Coordinates are packed float64 (see float64_base64), signals are rounded to int16 with
+    SIG_MISSING for "none", and types are indices into TYPE_NAMES.
+    """
+    lats, lons = array.array("d"), array.array("d")
+    sigs, types, ssids = [], [], []
+    for f in features:
+        props = f.get("properties") or {}
+        coords = f["geometry"]["coordinates"]
+        lons.append(float(coords[0]))
+        lats.append(float(coords[1]))
+        sig = extract_signal_dbm(props)
+        if sig is None or not math.isfinite(sig):
+            sigs.append(SIG_MISSING)
+        else:
+            sigs.append(max(-32767, min(32767, round(sig))))
+        types.append(_TYPE_CODES[infer_type(props)])
+        ssids.append(str(first_prop(props, "SSID", "ssid", "dot11.device.ssid") or "").lower())
+    return {
+        "lat": float64_base64(lats), "lon": float64_base64(lons),
+        "sig": sigs, "typ": types, "ssid": ssids,
+    }
+
+
+class GzipBase64Writer:
+    """Text sink that gzips everything written to it and forwards it to fh as base64."""
+
+    def __init__(self, fh, level: int = 9):
+        self._fh = fh
+        self._z = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits=31: gzip container
+        self._pending = b""  # base64 works in 3-byte groups; carry the remainder over
+
+    def write(self, s: str) -> None:
+        self._emit(self._z.compress(s.encode("utf-8")))
+
+    def _emit(self, data: bytes) -> None:
+        if self._pending:
+            data = self._pending + data
+        cut = len(data) - len(data) % 3
+        if cut:
+            self._fh.write(base64.b64encode(data[:cut]).decode("ascii"))
+        self._pending = data[cut:]
+
+    def close(self) -> None:
+        self._emit(self._z.flush())
+        self._fh.write(base64.b64encode(self._pending).decode("ascii"))
+        self._pending = b""
+
+
+def write_geojson_stream(fh, features: list[dict]) -> None:
+    """Serialize a FeatureCollection feature by feature into an open text file."""
+    fh.write('{"type":"FeatureCollection","features":[')
+    first = True
+    for f in features:
+        if not first:
+            fh.write(",")
+        fh.write(_dumps(f))
+        first = False
+    fh.write("]}")
+
+
+def write_html(fh, geojson: dict, title: str) -> None:
+    # Drop features without a point up front so GEOJSON and COLS share indices
+    features = [f for f in geojson.get("features") or [] if has_point(f)]
+    for i, part in enumerate(render_template_parts(title)):
+        if not i % 2:
+            fh.write(part)
+        elif part == "geojson":
+            gz = GzipBase64Writer(fh)
+            write_geojson_stream(gz, features)
+            gz.close()
+        else:
+            # COLS sits in an inline <script>: escape "<" so an SSID like "</script>" can't end it
+            fh.write(_dumps(build_columns(features)).replace("<", "\\u003c"))
+
+
+def build_html(geojson: dict, title: str) -> str:
+    buf = io.StringIO()
+    write_html(buf, geojson, title)
+    return buf.getvalue()
+
 
 def main():
     ap = argparse.ArgumentParser(description="Build Leaflet HTML map with dual coloring modes")
@@ -484,9 +696,9 @@ def main():
         else:
             raise ValueError("Input is not a GeoJSON FeatureCollection")
 
-    html = build_html(geo, args.title)
     args.out.parent.mkdir(parents=True, exist_ok=True)
-    args.out.write_text(html, encoding="utf-8")
+    with open(args.out, "w", encoding="utf-8", buffering=1 << 20) as fh:
+        write_html(fh, geo, args.title)
     print(f"Wrote map: {args.out}")
 
 
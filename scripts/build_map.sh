@@ -187,7 +187,7 @@ for d in devices:
     })
     added += 1
 
-curr_gj.write_text(json.dumps(curr, ensure_ascii=False, indent=2), encoding="utf-8")
+curr_gj.write_text(json.dumps(curr, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[NoGPS] Inferred APs from previous runs: {added}")
 PY
 
@@ -616,7 +616,7 @@ for d in devs:
     fc["features"].append(mk_feature(lon, lat, props))
     added += 1
 
-gj_path.write_text(json.dumps(fc, ensure_ascii=False, indent=2), encoding="utf-8")
+gj_path.write_text(json.dumps(fc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[Merge] Added non-AP devices: {added}")
 PY
 
@@ -689,7 +689,7 @@ for d in devices:
     })
     added += 1
 
-curr_gj.write_text(json.dumps(curr, ensure_ascii=False, indent=2), encoding="utf-8")
+curr_gj.write_text(json.dumps(curr, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[NoGPS] Inferred APs from previous runs: {added}")
 PY
 
@@ -854,7 +854,7 @@ for f in fc.get("features", []):
         updated += 1
 
 if updated:
-    gj.write_text(json.dumps(fc, ensure_ascii=False, indent=2), encoding="utf-8")
+    gj.write_text(json.dumps(fc, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[Enrich] Updated encryption/channel on APs: {updated}")
 PY
 
@@ -907,7 +907,7 @@ for f in curr_feats:
     if k in idx: continue
     idx[k]=1; merged.append(f); added+=1
 
-acc.write_text(json.dumps({"type":"FeatureCollection","features":merged}, ensure_ascii=False, indent=2), encoding="utf-8")
+acc.write_text(json.dumps({"type":"FeatureCollection","features":merged}, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[MergeRuns] prev={len(prev_feats)} new={len(curr_feats)} -> merged={len(merged)} (added {added})")
 PY
 
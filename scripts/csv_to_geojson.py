@@ -1,60 +1,164 @@
 #!/usr/bin/env python3
-import csv, json, sys
+import csv, json, os, re, sys
+
+# pandas + pyarrow parse the CSV columns in C; fall back to csv.DictReader without them
+try:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pd = None
+
+try:
+    import orjson
+
+    def _dumps(obj):
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+except ImportError:
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 if len(sys.argv) != 3:
     print(f"Usage: {sys.argv[0]} input.csv output.geojson")
     sys.exit(1)
 
 infile, outfile = sys.argv[1], sys.argv[2]
-features = []
+
+_DBM_RE = re.compile(r"\s*[dD][bB][mM]$")
 
 def to_float(val):
     if val is None:
         return None
-    s = str(val).strip().lower().replace("dbm", "").replace("-", "-")
-    if s in {"", "none", "nan", ""}:
+    # fast path: Wigle RSSI is almost always a clean number like "-75"
+    try:
+        f = float(val)
+        return f if f == f else None  # NaN -> None
+    except (TypeError, ValueError):
+        pass
+    s = _DBM_RE.sub("", str(val).strip()).replace("\u2212", "-")
+    if s.lower() in {"", "none", "nan"}:
         return None
     try:
         return float(s)
-    except:
+    except ValueError:
         try:
             return float(s.replace(",", "."))
-        except:
+        except ValueError:
             return None
 
-with open(infile, newline='', encoding="utf-8") as f:
-    _ = f.readline()  # skip WigleWifi-1.4 metadata line
-    reader = csv.DictReader(f)
-    for row in reader:
-        lat = row.get("CurrentLatitude") or row.get("Latitude")
-        lon = row.get("CurrentLongitude") or row.get("Longitude")
-        if not lat or not lon:
-            continue
-        try:
-            lat = float(lat)
-            lon = float(lon)
-        except:
-            continue
-        if abs(lat) < 1e-4 and abs(lon) < 1e-4:
-            continue
-
-        sig = to_float(row.get("RSSI"))
-
-        feature = {
-            "type": "Feature",
-            "geometry": {"type": "Point", "coordinates": [lon, lat]},
-            "properties": {
-                "SSID": row.get("SSID", "hidden"),
-                "BSSID": row.get("MAC", ""),
-                "Channel": row.get("Channel", ""),
-                "Signal": sig,
-                "Encryption": row.get("AuthMode", "")
-            }
+def make_feature(lon, lat, ssid, mac, chan, sig, enc):
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]},
+        "properties": {
+            "SSID": ssid,
+            "BSSID": mac,
+            "Channel": chan,
+            "Signal": sig,
+            "Encryption": enc
         }
-        features.append(feature)
+    }
+
+def keep_mask(lat, lon):
+    """True for rows with a usable position (not NaN, not null island)."""
+    return ~(np.isnan(lat) | np.isnan(lon) | ((np.abs(lat) < 1e-4) & (np.abs(lon) < 1e-4)))
+
+CHUNK_ROWS = 4096
+
+def iter_features_pandas(path):
+    try:
+        with open(path, "rb") as f:
+            _ = f.readline()  # skip WigleWifi-1.4 metadata line
+            start = f.tell()
+            header = next(csv.reader([f.readline().decode("utf-8")]), [])
+            f.seek(start)
+            # Every column as text, like csv.DictReader: no type inference, so an SSID
+            # "007" or Channel "06" is kept verbatim
+            types = pa_csv.ConvertOptions(column_types={name: pa.string() for name in header})
+            df = pa_csv.read_csv(f, convert_options=types).to_pandas()
+    except pa.ArrowInvalid:
+        # rows with too few/many fields: csv.DictReader tolerates them, so use it
+        yield from iter_features_csv(path)
+        return
+
+    def num(col):
+        if col not in df:
+            return pd.Series(np.nan, index=df.index)
+        return pd.to_numeric(df[col].str.strip(), errors="coerce")
+
+    def text(col, default):
+        return df[col] if col in df else pd.Series(default, index=df.index)
+
+    lat = num("CurrentLatitude").fillna(num("Latitude"))
+    lon = num("CurrentLongitude").fillna(num("Longitude"))
+    keep = keep_mask(lat.to_numpy(np.float64), lon.to_numpy(np.float64))
+
+    rssi = text("RSSI", "").str.strip().str.lower()
+    rssi = rssi.str.replace("dbm", "", regex=False).str.replace(",", ".", regex=False)
+    rssi = rssi.str.replace("\u2212", "-", regex=False)  # Unicode minus, as in to_float()
+    sig = pd.to_numeric(rssi, errors="coerce").astype("float64")
+
+    cols = [
+        lon[keep], lat[keep], text("SSID", "hidden")[keep], text("MAC", "")[keep],
+        text("Channel", "")[keep], sig[keep], text("AuthMode", "")[keep],
+    ]
+    # Columns are converted to Python objects a slice at a time, so only CHUNK_ROWS rows
+    # of them exist before their features are written
+    for i in range(0, len(cols[0]), CHUNK_ROWS):
+        chunk = (c.iloc[i:i + CHUNK_ROWS].tolist() for c in cols)
+        for x, y, ssid, mac, chan, s, enc in zip(*chunk):
+            yield make_feature(x, y, ssid, mac, chan, s if s == s else None, enc)  # NaN -> None
+
+def iter_features_csv(path):
+    with open(path, newline='', encoding="utf-8") as f:
+        _ = f.readline()  # skip WigleWifi-1.4 metadata line
+        reader = csv.DictReader(f)
+        for row in reader:
+            lat = row.get("CurrentLatitude") or row.get("Latitude")
+            lon = row.get("CurrentLongitude") or row.get("Longitude")
+            if not lat or not lon:
+                continue
+            try:
+                lat = float(lat)
+                lon = float(lon)
+            except:
+                continue
+            if abs(lat) < 1e-4 and abs(lon) < 1e-4:
+                continue
+
+            sig = to_float(row.get("RSSI"))
+
+            yield make_feature(
+                lon, lat, row.get("SSID", "hidden"), row.get("MAC", ""),
+                row.get("Channel", ""), sig, row.get("AuthMode", "")
+            )
+
+def write_feature_collection(path, features):
+    """Stream features into a FeatureCollection file; returns how many were written.
+
+    Writes to a sibling .tmp file and renames it into place only on success, so a
+    read/parse error never leaves a truncated file or clobbers the previous one.
+    """
+    tmp = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp, "w", encoding="utf-8", buffering=1 << 20) as out:
+            out.write('{"type":"FeatureCollection","features":[')
+            for feature in features:
+                if count:
+                    out.write(",")
+                out.write(_dumps(feature))
+                count += 1
+            out.write("]}")
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return count
 
-geojson = {"type": "FeatureCollection", "features": features}
-with open(outfile, "w", encoding="utf-8") as out:
-    json.dump(geojson, out, indent=2)
+features = iter_features_pandas(infile) if pd is not None else iter_features_csv(infile)
+count = write_feature_collection(outfile, features)
 
-print(f"Saved {len(features)} features to {outfile}")
+print(f"Saved {count} features to {outfile}")
@@ -110,7 +110,7 @@ for d in devices:
     })
     added += 1
 
-curr_gj.write_text(json.dumps(curr, ensure_ascii=False, indent=2), encoding="utf-8")
+curr_gj.write_text(json.dumps(curr, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[NoGPS] Inferred APs from previous runs: {added}")
 PY
 
@@ -152,7 +152,7 @@ for f in curr:
     if k in seen: continue
     seen.add(k); merged.append(f); added+=1
 
-acc.write_text(json.dumps({"type":"FeatureCollection","features":merged}, ensure_ascii=False, indent=2), encoding="utf-8")
+acc.write_text(json.dumps({"type":"FeatureCollection","features":merged}, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
 print(f"[MergeRuns] prev={len(prev)} new={len(curr)} -> merged={len(merged)} (added {added})")
 PY
 
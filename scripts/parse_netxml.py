@@ -1,33 +1,87 @@
 #!/usr/bin/env python3
-import sys, csv, json, xml.etree.ElementTree as ET
+import sys, csv, io, json, xml.etree.ElementTree as ET
 from pathlib import Path
 
+# lxml's iterparse is several times faster; stdlib iterparse is the fallback
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    import orjson
+
+    def _dumps(obj, pretty=False):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+except ImportError:
+    def _dumps(obj, pretty=False):
+        if pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2)
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+def iter_networks(path):
+    """Yield <wireless-network> elements one at a time, freeing each after use."""
+    if etree is not None:
+        for _, net in etree.iterparse(str(path), events=("end",), tag="wireless-network"):
+            yield net
+            net.clear()
+            while net.getprevious() is not None:
+                del net.getparent()[0]
+        return
+
+    root = None
+    for event, net in ET.iterparse(str(path), events=("start", "end")):
+        if root is None:
+            root = net  # first start event
+        elif event == "end" and net.tag == "wireless-network":
+            yield net
+            # stdlib elements have no getparent(): clear the root so finished
+            # networks are dropped rather than left behind as empty children
+            root.clear()
+
+CSV_HEADER = ["SSID","BSSID","Encryption","Channel","Latitude","Longitude","Signal_dBm"]
+
+_csv_buf = io.StringIO()
+_csv_writer = csv.writer(_csv_buf)
+
+def csv_line(fields):
+    """Format one CSV record (no line terminator), identical to csv.writer output."""
+    line = ",".join(["" if v is None else v for v in fields])
+    # fast path: nothing to quote, so a plain join is already valid CSV
+    if line.count(",") == len(fields) - 1 and '"' not in line and "\n" not in line and "\r" not in line:
+        return line
+    # e.g. SSIDs with commas or quotes go through csv.writer
+    _csv_buf.seek(0)
+    _csv_buf.truncate()
+    _csv_writer.writerow(fields)
+    return _csv_buf.getvalue().rstrip("\r\n")
+
 def parse_netxml(path):
-    root = ET.parse(path).getroot()
-    rows, features = [], []
+    """Return (csv_lines, geojson) for one netxml file, built in a single pass."""
+    csv_lines, features = [], []
 
-    for net in root.findall("wireless-network"):
+    for net in iter_networks(path):
         # Basic fields (defensive parsing)
+        # Each subtree is located once; findtext() replaces find() + None check + .text
         bssid = net.get("BSSID") or "unknown"
-        ssid_el = net.find("SSID/essid")
-        ssid = (ssid_el.text if ssid_el is not None else "hidden").strip() or "hidden"
-
-        enc_el = net.find("SSID/encryption")
-        enc = (enc_el.text if enc_el is not None else "unknown").upper()
-
-        chan_el = net.find("channel")
-        chan = chan_el.text if chan_el is not None else ""
+        ssid_node = net.find("SSID")
+        if ssid_node is not None:
+            ssid = ssid_node.findtext("essid", "hidden").strip() or "hidden"
+            enc = ssid_node.findtext("encryption", "unknown").upper()
+        else:
+            ssid, enc = "hidden", "UNKNOWN"
 
-        rssi_el = net.find("snr-info/last_signal_dbm")
-        rssi = rssi_el.text if rssi_el is not None else ""
+        chan = net.findtext("channel", "")
+        rssi = net.findtext("snr-info/last_signal_dbm", "")
 
         # GPS (avg lat/lon generally best for per-network point)
-        lat_el = net.find("gps-info/avg-lat")
-        lon_el = net.find("gps-info/avg-lon")
-        lat = lat_el.text if lat_el is not None else None
-        lon = lon_el.text if lon_el is not None else None
+        gps = net.find("gps-info")
+        if gps is not None:
+            lat, lon = gps.findtext("avg-lat"), gps.findtext("avg-lon")
+        else:
+            lat = lon = None
 
-        rows.append([ssid, bssid, enc, chan, lat, lon, rssi])
+        csv_lines.append(csv_line([ssid, bssid, enc, chan, lat, lon, rssi]))
 
         if lat and lon:
             try:
@@ -42,29 +96,31 @@ def parse_netxml(path):
             except ValueError:
                 pass
 
-    return rows, {"type": "FeatureCollection", "features": features}
+    return csv_lines, {"type": "FeatureCollection", "features": features}
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 parse_netxml.py /path/to/*.netxml")
+    # GeoJSON is written compact; --pretty restores indented output for reading by hand
+    pretty = "--pretty" in sys.argv[1:]
+    paths = [a for a in sys.argv[1:] if a != "--pretty"]
+    if not paths:
+        print("Usage: python3 parse_netxml.py [--pretty] /path/to/*.netxml")
         sys.exit(1)
 
-    for arg in sys.argv[1:]:
+    for arg in paths:
         for p in sorted(Path().glob(arg) if any(x in arg for x in "*?[]") else [Path(arg)]):
             if not p.exists(): 
                 print(f"Skip (not found): {p}")
                 continue
-            rows, geo = parse_netxml(p)
+            csv_lines, geo = parse_netxml(p)
             csv_out = p.with_suffix(".csv")
             geo_out = p.with_suffix(".geojson")
 
-            with open(csv_out, "w", newline="") as f:
-                w = csv.writer(f)
-                w.writerow(["SSID","BSSID","Encryption","Channel","Latitude","Longitude","Signal_dBm"])
-                w.writerows(rows)
+            with open(csv_out, "w", newline="", buffering=1 << 20) as f:
+                # csv.writer's default \r\n terminator, so output is unchanged
+                f.write("\r\n".join([csv_line(CSV_HEADER), *csv_lines]) + "\r\n")
 
-            with open(geo_out, "w") as f:
-                json.dump(geo, f, indent=2)
+            with open(geo_out, "w", encoding="utf-8") as f:
+                f.write(_dumps(geo, pretty=pretty))
 
             print(f"OK: {p.name} → {csv_out.name}, {geo_out.name} ({len(geo['features'])} points)")
 